@@ -5,14 +5,11 @@ from PyQt5.QtWidgets import QApplication
 from kanelbulle.config import config
 from kanelbulle.utils import log
 from kanelbulle.gui import mainwindow
-
-
-app = None
+from kanelbulle.misc import socket as misc_socket
 
 
 def main():
     """Initialize and run the application."""
-    global app
     app = QApplication(sys.argv)
     app.setApplicationName("kanelbulle")
 
@@ -21,7 +18,7 @@ def main():
     window = mainwindow.MainWindow()
     window.show()
 
-    return mainloop()
+    return app.exec_()
 
 
 def initialization():
@@ -32,8 +29,6 @@ def initialization():
         log.config.warning("{}.".format(config.var.error))
     if log.ERROR:
         log.log.warning('Could not find settings in config.')
-
-
-def mainloop():
-    """Simple wrapper to get a better stack trace for segfaults."""
-    return app.exec_()
+    for key in misc_socket.CONFIG_ERRORS:
+        log.socket.warning('Ignored the invalid entry (socket --> {}) in the '
+                           'config.json file.'.format(key))
@@ -1,8 +1,11 @@
 """The main window of kanelbulle."""
 
+import itertools
+import operator
 from PyQt5.QtGui import QTextCursor
 from PyQt5.QtWidgets import (QAction, QMainWindow, QStatusBar, QTabWidget,
                              QVBoxLayout, QWidget)
+from kanelbulle.misc.bufferpool import BufferPool
 from kanelbulle.misc.socket import Server
 from kanelbulle.utils import log
 
@@ -15,12 +18,20 @@ class MainWindow(QMainWindow):
     and connects signals.
 
     Attributes:
-        count: Number of total connections.
+        count: Iterator providing the number of the next connection.
+        pool: The receive buffer pool shared by all connections.
         status: The status bar widget.
-        tabs: List of all added widgets to tabwidget.
+        tabs: Dict mapping each widget added to tabwidget to its server.
         tabwidget: The tab widget.
     """
 
+    # Actions of the edit menu: (description, status tip, name of the slot).
+    _ACTIONS = (
+        ("New connection", "New connection...", "_add_tab"),
+        ("Close current connection", "Close current connection...",
+         "_close_tab"),
+    )
+
     def __init__(self, parent=None):
         """Creates a new main window."""
         super().__init__(parent)
@@ -28,15 +39,18 @@ class MainWindow(QMainWindow):
         self.setMinimumWidth(700)
 
         # Define tab environment.
-        self.tabs = list()
-        self.count = 0
+        self.tabs = dict()
+        self.count = itertools.count(1)
+        self.pool = BufferPool()
         self.tabwidget = QTabWidget()
 
         # Define menu-bar.
         edit_menu = self.menuBar().addMenu("&Edit")
-        self._create_action(edit_menu, "New connection", self._add_tab)
-        self._create_action(edit_menu, "Close current connection",
-                            self._close_tab)
+        for desc, tip, slot in self._ACTIONS:
+            action = QAction(desc, self)
+            action.setStatusTip(tip)
+            action.triggered.connect(getattr(self, slot))
+            edit_menu.addAction(action)
 
         # Set layout.
         layout = QVBoxLayout()
@@ -53,70 +67,97 @@ class MainWindow(QMainWindow):
         # Initial tab.
         self._add_tab()
 
-    def _create_action(self, menu, desc, slot):
-        """Creates an user interface action and adds it to a menu bar.
-
-        Args:
-            menu: The menu bar widget.
-            desc: The description of the action.
-            slot: The slot, which is triggered by the action.
-        """
-        action = QAction(desc, self)
-        action.setStatusTip(desc + "...")
-        action.triggered.connect(slot)
-        menu.addAction(action)
-
     def _add_tab(self):
         """Adds a new connection (tab)."""
-        self.count += 1
-        log.gui.info('Add connection {}'.format(self.count))
+        count = next(self.count)
+        log.gui.info(f'Add connection {count}')
 
         # The tabbed widget.
-        server = Server(self.count)
+        server = Server(count, self.pool)
         server.recvEdit.sender.signal.connect(self._update_socket_log)
         layout = QVBoxLayout()
         layout.addLayout(server.create_layout())
         tab = QWidget()
         tab.setLayout(layout)
+        tab.setProperty("conn_id", count)
 
         # Remember the tabbed widget.
-        self.tabs.append([server, tab])
+        self.tabs[tab] = server
 
         # Add the tabbed widget to the tab widget and show it.
-        self.tabwidget.addTab(tab, "Connection {}".format(self.count))
-        self.tabwidget.setCurrentIndex(self.count-1)
+        self.tabwidget.addTab(tab, f"Connection {count}")
+        self.tabwidget.setCurrentWidget(tab)
 
     def _close_tab(self):
         """Closes the current visible connection (tab) and deletes the
         respective sub-widget."""
-        idx = self.tabwidget.currentIndex()
+        tab = self.tabwidget.currentWidget()
+        if tab is None:
+            return
 
-        # Close the server connection of the active tab.
-        server = self.tabs[idx][0]
-        if server.createButton.isChecked():
-            server.createButton.click()
+        # Close the server connection of the active tab and release its log.
+        server = self.tabs.pop(tab)
+        self._stop_server(server)
+        server.close_log()
 
         # Remove the tabbed widget from the tab widget.
-        self.tabwidget.removeTab(idx)
+        self.tabwidget.removeTab(self.tabwidget.indexOf(tab))
 
         # Delete the tabbed widget.
-        tab = self.tabs[idx][1]
         tab.deleteLater()
 
-        # Remove the list entry of the tabbed widget.
-        self.tabs.pop(idx)
+        conn_id = tab.property("conn_id")
+        log.gui.info(f'Deleted connection {conn_id}')
 
-        log.gui.info('Deleted connection {}'.format(self.count))
+    def closeEvent(self, event):
+        """Stops the servers and log listeners of all connections before the
+        window closes."""
+        for server in self.tabs.values():
+            self._stop_server(server)
+            server.close_log()
+        super().closeEvent(event)
+
+    @staticmethod
+    def _stop_server(server):
+        """Stops a server, if it is running.
+
+        Args:
+            server: An instance of Server.
+        """
+        if server.createButton.isChecked():
+            server.createButton.click()
 
-    def _update_socket_log(self, widget, msg):
-        """Inserts html formatted text at the end of widget.
+    def _update_socket_log(self, widget, handler):
+        """Appends all pending log records to the end of widget. Scrolls to
+        the bottom afterwards, if the widget was scrolled to the bottom before.
 
         Args:
-            widget: An instance of QTextEdit.
-            msg: The html formatted text do display.
+            widget: An instance of QPlainTextEdit.
+            handler: The SocketLog instance holding the pending log records.
         """
+        records = handler.take_pending()
+        if not records:
+            return
         try:
-            widget.moveCursor(QTextCursor.End)
-            widget.insertHtml(msg)
+            bar = widget.verticalScrollBar()
+            at_bottom = bar.value() == bar.maximum()
+
+            new_block = not widget.document().isEmpty()
+            cursor = handler.cursor
+            cursor.movePosition(QTextCursor.End)
+            cursor.beginEditBlock()
+            # Consecutive records of the same level are inserted at once, the
+            # line feeds between them become block separators.
+            for text_format, group in itertools.groupby(
+                    records, key=operator.itemgetter(0)):
+                if new_block:
+                    cursor.insertBlock()
+                cursor.insertText('\n'.join(text for _, text in group),
+                                  text_format)
+                new_block = True
+            cursor.endEditBlock()
+
+            if at_bottom:
+                handler.scroll()
         except OSError:
             pass
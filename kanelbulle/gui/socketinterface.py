@@ -1,13 +1,36 @@
 """Interface for socket communication."""
 
+import collections
 import logging
+import logging.handlers
+import queue
+from PyQt5.QtGui import QColor, QTextCharFormat, QTextCursor
 from PyQt5.QtWidgets import (QFileDialog, QGroupBox, QHBoxLayout, QLabel,
-                             QLineEdit, QPushButton, QRadioButton, QStyle,
-                             QTextEdit, QVBoxLayout, QWidget)
+                             QLineEdit, QPlainTextEdit, QPushButton,
+                             QRadioButton, QStyle, QVBoxLayout, QWidget)
 from kanelbulle.gui.objects import SenderObject
 from kanelbulle.gui.widgets import QAutoSizeLineEdit, QVLine
 from kanelbulle.utils import log
 
+# Icon shared by the file buttons of all interfaces (see _file_icon).
+_FILE_ICON = None
+
+
+def _file_icon(widget):
+    """Provides the standard file icon of the style used by widget. The icon
+    is created once and shared afterwards.
+
+    Args:
+        widget: The widget asking for the icon.
+
+    Return:
+        The file icon.
+    """
+    global _FILE_ICON
+    if _FILE_ICON is None:
+        _FILE_ICON = widget.style().standardIcon(QStyle.SP_FileIcon)
+    return _FILE_ICON
+
 
 class SocketInterface(QWidget):
 
@@ -17,6 +40,7 @@ class SocketInterface(QWidget):
             stringToSend: The string to send.
             fileToSend: The path to the file to send.
             logger: The logger.
+            listener: Passes the log records of logger to the widget.
     """
 
     def __init__(self, count, parent=None):
@@ -46,8 +70,7 @@ class SocketInterface(QWidget):
 
         self.fileToSend = ""
         self.fileButton = QPushButton()
-        self.fileButton.setIcon(self.style().standardIcon(
-            getattr(QStyle, "SP_FileIcon")))
+        self.fileButton.setIcon(_file_icon(self))
         self.fileButton.setToolTip("Open file...")
         self.fileButton.setStatusTip("Open file...")
         self.fileButton.clicked.connect(self._file_open)
@@ -68,8 +91,17 @@ class SocketInterface(QWidget):
         self.clearButton.setStatusTip("Clear messages...")
 
         self.recvEdit = SocketLog(self)
-        self.logger = log.get_logger('Connection {}'.format(count))
-        self.logger.addHandler(self.recvEdit)
+        self.logger = log.get_logger(f'Connection {count}')
+
+        # Hand the log records to the widget in a separate thread, so that
+        # logging does not hold up the socket communication.
+        records = queue.Queue()
+        handler = logging.handlers.QueueHandler(records)
+        handler.setLevel(self.recvEdit.level)
+        self.logger.addHandler(handler)
+        self.listener = logging.handlers.QueueListener(
+            records, self.recvEdit, respect_handler_level=True)
+        self.listener.start()
 
         # Initialize interface.
         self._toggle_create_server()
@@ -92,6 +124,18 @@ class SocketInterface(QWidget):
         edit.setText(text)
         return edit
 
+    @staticmethod
+    def _set_tip(widget, tip):
+        """Sets the tool and status tip of a widget, unless already set.
+
+        Args:
+            widget: The widget.
+            tip: The text of the tool and status tip.
+        """
+        if widget.toolTip() != tip:
+            widget.setToolTip(tip)
+            widget.setStatusTip(tip)
+
     def create_layout(self):
         """Creates a vertical box layout which contains all groups.
 
@@ -181,12 +225,10 @@ class SocketInterface(QWidget):
         """
         if self.createButton.isChecked():
             self.createButton.setText('Stop')
-            self.createButton.setToolTip("Stop server...")
-            self.createButton.setStatusTip("Stop server...")
+            self._set_tip(self.createButton, "Stop server...")
         else:
             self.createButton.setText('Create')
-            self.createButton.setToolTip("Create server...")
-            self.createButton.setStatusTip("Create server...")
+            self._set_tip(self.createButton, "Create server...")
 
     def _toggle_radio_data(self):
         """Toggles between the following options:
@@ -197,14 +239,14 @@ class SocketInterface(QWidget):
             self.sendEdit.setDisabled(False)
             self.sendEdit.setPlaceholderText("Type in a string to send.")
             self.fileButton.setDisabled(True)
-            self._what_to_send(text=self.stringToSend)
+            self._apply_text(self.stringToSend)
             log.gui.info('Prepared to send a string.')
         else:
             self.stringToSend = self.sendEdit.text()
             self.sendEdit.setDisabled(True)
             self.sendEdit.setPlaceholderText("Select a json file.")
             self.fileButton.setDisabled(False)
-            self._what_to_send(text=self.fileToSend)
+            self._apply_text(self.fileToSend)
             log.gui.info('Prepared to send a JSON file.')
 
     def _toggle_start_recv(self):
@@ -214,29 +256,46 @@ class SocketInterface(QWidget):
         """
         if self.startButton.isChecked():
             self.startButton.setText('Stop')
-            self.startButton.setToolTip("Stop receiving messages...")
-            self.startButton.setStatusTip("Stop receiving messages...")
+            self._set_tip(self.startButton, "Stop receiving messages...")
         else:
             self.startButton.setText('Start')
-            self.startButton.setToolTip("Start receiving messages...")
-            self.startButton.setStatusTip("Start receiving messages...")
+            self._set_tip(self.startButton, "Start receiving messages...")
 
     def clear(self):
         """Deletes all the text in the widget."""
         self.recvEdit.widget.clear()
         log.gui.info("Cleared log records in widget.")
 
+    def close_log(self):
+        """Detaches the widget from the logger and releases the logger, so
+        that both can be garbage collected once the connection is closed."""
+        self.listener.stop()
+        log.release_logger(self.logger)
+        self.recvEdit.close()
+
+    def _apply_text(self, text):
+        """Sets the text of sendEdit without emitting textChanged and updates
+        the tool and status tip accordingly.
+
+        Args:
+            text: The new text of sendEdit.
+        """
+        if self.sendEdit.text() != text:
+            self.sendEdit.blockSignals(True)
+            self.sendEdit.setText(text)
+            self.sendEdit.blockSignals(False)
+        self._what_to_send(text)
+
     def _what_to_send(self, text):
-        """Sets the text of the tool and status tip of sendEdit.
+        """Sets the text of the tool and status tip of sendEdit. Called
+        whenever the text of sendEdit changes.
 
         Args:
             text: The text contained by the tool and status tip.
         """
         if self.stringRadio.isChecked():
             self.stringToSend = text
-        self.sendEdit.setText(text)
-        self.sendEdit.setToolTip('Send: {}'.format(text))
-        self.sendEdit.setStatusTip('Send: {}'.format(text))
+        self._set_tip(self.sendEdit, f'Send: {text}')
 
     def _file_open(self):
         """Constructs a file dialog to get the path to a JSON file."""
@@ -246,39 +305,80 @@ class SocketInterface(QWidget):
 
         if path:
             self.fileToSend = path
-            self._what_to_send(text=path)
+            self._apply_text(path)
 
 
 class SocketLog(logging.Handler):
 
     """Logging handler which sends the logging output to a widget.
 
+    Log records are collected in a queue of pending records. Only the first
+    record of a batch triggers the signal, the main thread then fetches all
+    pending records at once (see take_pending).
+
     Attributes:
         widget: The widget responsible for showing the logging output.
+        cursor: A text cursor on the document of the widget, used to append
+        the log records.
         sender: An instance of the class SenderObject, which contains a
         signal used to update the content of the widget. This signal is needed,
         because the used widget belongs to the QtGui class and hence can only
         be accessed from the main thread (here, class MainWindow).
     """
 
+    # Maximum number of log records kept by the widget.
+    max_records = 5000
+
     def __init__(self, parent):
         super().__init__()
         self.setLevel(logging.INFO)
         self.setFormatter(log.FORMATTER)
-        self.widget = QTextEdit(parent)
+        self.widget = QPlainTextEdit(parent)
         self.widget.setReadOnly(True)
-        self.widget.textChanged.connect(self.scroll)
+        self.widget.setMaximumBlockCount(self.max_records)
+        self.cursor = QTextCursor(self.widget.document())
         self.widget.setPlaceholderText("Create a server and press start to "
                                        "send and receive messages.")
         self.sender = SenderObject()
 
+        # Text format of a log record of the respective level.
+        self._formats = dict()
+        for level, color in log.LOG_LEVEL_COLOR.items():
+            self._formats[level] = QTextCharFormat()
+            self._formats[level].setForeground(QColor(color))
+
+        # Log records not yet shown by the widget. Appending to and popping
+        # from a deque is thread-safe, hence no lock is needed.
+        self._pending = collections.deque()
+        self._notified = False
+
     def emit(self, record):
-        """Updates the content of the widget with new log records."""
-        color = log.LOG_LEVEL_COLOR[record.levelname]
-        msg = self.format(record)
-        msg = '<font color={}> {} </font><br />'.format(color, msg)
+        """Queues a log record and notifies the main thread if needed."""
+        self._pending.append((self._formats[record.levelname],
+                              self.format(record)))
+        if not self._notified:
+            self._notified = True
+            self.sender.signal.emit(self.widget, self)
+
+    def take_pending(self):
+        """Removes all pending log records.
 
-        self.sender.signal.emit(self.widget, msg)
+        The flag is reset before the queue is drained. A record queued
+        meanwhile is either part of this batch or notifies again, but it is
+        never left behind.
+
+        Return:
+            batch: List of (text format, text) of all pending log records.
+        """
+        self._notified = False
+        batch = []
+        pop = self._pending.popleft
+        while True:
+            try:
+                batch.append(pop())
+            except IndexError:
+                break
+        return batch
 
     def scroll(self):
         """Scrolls to the bottom of the widget."""
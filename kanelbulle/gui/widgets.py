@@ -1,5 +1,6 @@
 """Useful widgets."""
 
+from PyQt5.QtCore import QEvent, QTimer
 from PyQt5.QtWidgets import QFrame, QLineEdit
 
 
@@ -28,21 +29,71 @@ class QAutoSizeLineEdit(QLineEdit):
     """A QLineEdit widget which automatically adjusts his width w to the input
     with respect to the bounds minWidth < w < maxWidth.
 
+    The width is adjusted at most once per resize interval, i.e. a burst of
+    text changes (fast typing, paste) results in a single adjustment.
+
     Attributes:
         minWidth: Lower bound for width.
         maxWidth: Upper bound for width.
     """
 
+    # Time in ms to wait for further text changes before adjusting the width.
+    resize_interval = 16
+
     def __init__(self, min_width, max_width, parent=None):
         super().__init__(parent)
         self.minWidth = min_width
         self.maxWidth = max_width
+        self._fm = None
+        self._ascii_widths = None
+        self._resize_timer = QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.setInterval(self.resize_interval)
+        self._resize_timer.timeout.connect(self._do_adjust)
         self.textChanged.connect(self.adjust_width)
 
     def adjust_width(self):
+        """Schedules the adjustment of the width, if not already pending."""
+        if not self._resize_timer.isActive():
+            self._resize_timer.start()
+
+    def changeEvent(self, event):
+        """Invalidates the cached font metrics if the font changes."""
+        if event.type() == QEvent.FontChange:
+            self._fm = None
+            self._ascii_widths = None
+            self.adjust_width()
+        super().changeEvent(event)
+
+    def _text_width(self, text):
+        """Computes the width of text in pixels. Printable ASCII text is
+        measured with a table of cached glyph widths, any other text with
+        the font metrics.
+
+        Args:
+            text: The text to measure.
+
+        Return:
+            width: The width of text.
+        """
+        if self._fm is None:
+            self._fm = self.fontMetrics()
+            self._ascii_widths = [self._fm.width(chr(c))
+                                  for c in range(32, 127)]
+
+        widths = self._ascii_widths
+        width = 0
+        for char in text:
+            code = ord(char)
+            if 32 <= code < 127:
+                width += widths[code-32]
+            else:
+                return self._fm.width(text)
+        return width
+
+    def _do_adjust(self):
         """Adjust the width with respect to the bounds."""
-        fm = self.fontMetrics()
-        width = fm.width(self.text())+10
+        width = self._text_width(self.text())+10
         if width < self.minWidth:
             width = self.minWidth
         elif width > self.maxWidth:
@@ -0,0 +1,53 @@
+"""A pool of receive buffers shared by several connections."""
+
+import threading
+
+
+class BufferPool:
+
+    """Hands out slices of one large buffer (slab) instead of allocating a
+    new buffer for each received message.
+
+    Slices are handed out one after another. A new slab is allocated once the
+    space left in the current one falls below a threshold, the old slab is
+    freed as soon as no slice of it is in use anymore. Requests larger than a
+    slab get a buffer of their own.
+
+    Attributes:
+        slab_size: Size of a slab in bytes.
+        threshold: Minimum size of the space left in a slab in bytes.
+    """
+
+    def __init__(self, slab_size=1 << 20, threshold=4096):
+        self.slab_size = slab_size
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._view = None
+        self._offset = 0
+        self._new_slab()
+
+    def _new_slab(self):
+        """Replaces the current slab by a new one."""
+        self._view = memoryview(bytearray(self.slab_size))
+        self._offset = 0
+
+    def take(self, size):
+        """Provides a buffer.
+
+        Args:
+            size: Size of the buffer in bytes.
+
+        Return:
+            view: A writable memoryview of the requested size.
+        """
+        if size > self.slab_size:
+            return memoryview(bytearray(size))
+
+        with self._lock:
+            if self.slab_size - self._offset < size:
+                self._new_slab()
+            view = self._view[self._offset:self._offset+size]
+            self._offset += size
+            if self.slab_size - self._offset < self.threshold:
+                self._new_slab()
+        return view
@@ -1,11 +1,112 @@
 """Utilities related to socket communication."""
 
 import json
+import logging
+import os
+import queue
+import re
+import selectors
 import socket
-import time
+import struct
+import threading
 from PyQt5.QtCore import QThread, pyqtSignal
 from kanelbulle.config import config
 from kanelbulle.gui.socketinterface import SocketInterface
+from kanelbulle.misc.bufferpool import BufferPool
+
+# Format of binary messages (see SocketServer.recv), requires msgpack.
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+BINARY_MAGIC = 0xA5
+_BINARY_HEADER = struct.Struct('>BI')
+
+# Vectored sends are not available on all platforms (e.g. Windows).
+_SENDMSG = hasattr(socket.socket, 'sendmsg')
+# Holds back a header until the body follows (Linux only).
+_MSG_MORE = getattr(socket, 'MSG_MORE', 0)
+
+# Length of a text message (see SocketServer.recv), at most _LEN_DIGITS
+# digits long.
+_LEN_DIGITS = 16
+_LEN_RE = re.compile(rb'(\d{1,%d})\n' % _LEN_DIGITS)
+
+# Received text messages looking like a JSON object.
+_OBJECT_RE = re.compile(rb'\s*\{.*\}\s*', re.DOTALL)
+
+# Parser for received JSON messages, accepting any bytes-like object. Use
+# simdjson or orjson if installed, both are considerably faster than the json
+# module. A simdjson parser must not be shared by several threads.
+try:
+    import simdjson
+    _parsers = threading.local()
+
+    def _loads(data):
+        try:
+            parser = _parsers.parser
+        except AttributeError:
+            parser = _parsers.parser = simdjson.Parser()
+        # Convert the whole document, it does not refer to the parser then.
+        return parser.parse(data, True)
+except ImportError:
+    try:
+        import orjson
+        _loads = orjson.loads
+    except ImportError:
+        def _loads(data):
+            return json.loads(bytes(data))
+
+# Load the socket configurations from file (socket --> sndbuf, rcvbuf,
+# buffer_relax, selector). Missing entries are replaced by defaults, the keys
+# of invalid entries are collected in CONFIG_ERRORS.
+CONFIG_ERRORS = []
+
+_SELECTORS = {'epoll': 'EpollSelector', 'kqueue': 'KqueueSelector',
+              'devpoll': 'DevpollSelector', 'poll': 'PollSelector',
+              'select': 'SelectSelector'}
+
+
+def _load_config(key, parse, default):
+    """Reads an entry of the socket configurations.
+
+    Args:
+        key: The key of the entry.
+        parse: Converts the entry, raises a ValueError if it is invalid.
+        default: Used if the entry is missing or invalid.
+
+    Return:
+        The converted entry or default.
+    """
+    try:
+        return parse(config.var.data['socket'][key])
+    except (TypeError, KeyError):
+        return default
+    except ValueError:
+        CONFIG_ERRORS.append(key)
+        return default
+
+
+def _parse_relax(value):
+    if value not in (0, 1, 2):
+        raise ValueError(value)
+    return value
+
+
+def _parse_selector(name):
+    selector_class = getattr(selectors, _SELECTORS.get(name, ''), None)
+    if selector_class is None:
+        raise ValueError(name)
+    return selector_class
+
+
+_BUFFER_SIZES = [(option, size) for option, size in (
+    (socket.SO_SNDBUF, _load_config('sndbuf', int, None)),
+    (socket.SO_RCVBUF, _load_config('rcvbuf', int, None))) if size is not None]
+_BUFFER_RELAX = _load_config('buffer_relax', _parse_relax, 1)
+_SELECTOR = _load_config('selector', _parse_selector,
+                         selectors.DefaultSelector)
 
 
 class SocketServer:
@@ -20,19 +121,54 @@ class SocketServer:
         connection.
         client_addr: Address bound to the socket on the other end of the
         connection.
+        pool: The pool providing the buffers for received messages.
+        binary: If True, dicts are sent in the binary format (see recv).
+        Otherwise they are sent as JSON.
+        validate: If True, files are checked to contain valid JSON before
+        they are sent. Otherwise they are sent as they are.
+        buffer_relax: Whether the buffer of a message too large for the pool
+        is kept for later messages (see _body). Can be set in the config.json
+        file (socket --> buffer_relax).
     """
 
     backlog = 1
-
-    def __init__(self, logger):
+    binary = False
+    validate = False
+    # Size of the receive buffer. Messages fitting into it are processed
+    # right in the buffer, larger ones are received into a buffer of the pool.
+    rxbuf_size = 16384
+    # Size of the largest buffer kept for later messages, if buffer_relax
+    # equals 1.
+    rxbody_size = 1 << 24
+    buffer_relax = _BUFFER_RELAX
+
+    def __init__(self, logger, pool=None):
         self.logger = logger
         self.socket = None
         self.client_conn = None
         self.client_addr = None
+        self.pool = pool if pool is not None else BufferPool()
+
+        # Bytes received from the client. The bytes from _rxpos up to
+        # _rxend are not processed yet.
+        self._rxbuf = bytearray(self.rxbuf_size)
+        self._rxview = memoryview(self._rxbuf)
+        self._rxpos = 0
+        self._rxend = 0
+        # A message too large for the receive buffer, which was interrupted
+        # by a timeout: [buffer, number of bytes received, binary].
+        self._partial = None
+
+        # Buffer for messages too large for the pool.
+        self._rxbody = bytearray()
 
     def create(self, host, port):
         """Creates a server.
 
+        The sizes of the send and receive buffers of the connections can be
+        set in the config.json file (socket --> sndbuf, rcvbuf). Otherwise
+        the defaults of the operating system are used.
+
         Args:
             host: Represents either a hostname or an IPv4 address.
             port: The port.
@@ -44,6 +180,14 @@ class SocketServer:
         if isinstance(host, str) and isinstance(port, int):
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             try:
+                # On Windows, SO_REUSEADDR would also let another socket bind
+                # the port while this one is listening on it.
+                if os.name != 'nt':
+                    self.socket.setsockopt(socket.SOL_SOCKET,
+                                           socket.SO_REUSEADDR, 1)
+                # Accepted connections inherit the buffer sizes.
+                for option, size in _BUFFER_SIZES:
+                    self.socket.setsockopt(socket.SOL_SOCKET, option, size)
                 self.socket.bind((host, port))
                 self.socket.listen(self.backlog)
             except socket.error as e:
@@ -68,18 +212,25 @@ class SocketServer:
             self.client_conn, self.client_addr = self.socket.accept()
         except socket.timeout:
             return False
+        self._rxpos = 0
+        self._rxend = 0
+        self._partial = None
+
+        # Send small messages immediately instead of waiting for the
+        # acknowledgement of the previous one (Nagle's algorithm).
+        self.client_conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
 
         self.logger.info("SERVER | Connection to client accepted. The "
                          "client IP is: {}.".format(self.client_addr))
         return True
 
     def send(self, data, path=False):
-        """Sends data to the socket in two steps.
-            1. step: Sends the length of the message.
-            2. step: Sends the original message.
+        """Sends data to the socket in one go, consisting of two parts.
+            1. part: The length of the message.
+            2. part: The original message.
 
         Args:
-            data: The data to send.
+            data: The data to send, either a string or a dict.
             path: If the data to send is within a file, path equals True.
             Otherwise path is False.
 
@@ -93,28 +244,145 @@ class SocketServer:
                               'No client is connected.')
             return [False, False]
 
-        # Read out data from file if wished.
+        # Send a file as it is, unless it has to be validated first. Then it
+        # is read into memory and checked to contain valid JSON.
         if path:
+            if not self.validate:
+                return self._send_file(data)
             try:
-                with open(data, 'r') as stream:
-                    data = json.load(stream)
-                data = json.dumps(data)
+                with open(data, 'rb') as stream:
+                    body = stream.read()
+                _loads(body)
             except (OSError, TypeError, ValueError) as e:
                 self.logger.error('SERVER | Could not send data. Reason: '
                                   '{}'.format(e))
                 return [True, False]
+        else:
+            # Serialize dicts, either in the binary format or as JSON.
+            if isinstance(data, dict):
+                if self.binary:
+                    return self._send_binary(data)
+                data = json.dumps(data)
+            body = data.encode()
+
+        try:
+            # Send the length of the message together with the message, the
+            # length being the number of encoded bytes.
+            length = len(body)
+            self._send_parts(b'%d\n' % length, body)
+            # Formatting the whole message is costly, skip it unless needed.
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug('SERVER | Send length of message: %s',
+                                  length)
+                self.logger.debug('SERVER | Send original message: %s',
+                                  body.decode(errors='replace'))
+
+            self.logger.info('SERVER | Message was sent.')
+            return [True, True]
+        except socket.error:
+            self.logger.error('SERVER | Error, can not send message. Reason: '
+                              'No client is connected.')
+            return [False, True]
+
+    def _send_file(self, path):
+        """Sends a file without reading it into memory. Where supported
+        (os.sendfile), the file is copied to the socket by the operating
+        system.
 
+        Args:
+            path: The path to the file.
+
+        Return:
+            - [#1, #2] as described by send.
+        """
         try:
-            # 1. step: Send the length of the message.
-            length = len(data)
-            self.client_conn.sendall(b'%d\n' % length)
-            self.logger.debug('SERVER | Send length of message: {}'.format(
-                length))
+            stream = open(path, 'rb')
+        except (OSError, TypeError) as e:
+            self.logger.error('SERVER | Could not send data. Reason: '
+                              '{}'.format(e))
+            return [True, False]
+
+        with stream:
+            try:
+                length = os.fstat(stream.fileno()).st_size
+            except OSError as e:
+                self.logger.error('SERVER | Could not send data. Reason: '
+                                  '{}'.format(e))
+                return [True, False]
+
+            try:
+                if not length:
+                    self.client_conn.sendall(b'0\n')
+                    sent = 0
+                else:
+                    self.client_conn.sendall(b'%d\n' % length, _MSG_MORE)
+                    sent = self.client_conn.sendfile(stream, 0, length)
+            except (ConnectionError, socket.timeout):
+                self.logger.error('SERVER | Error, can not send message. '
+                                  'Reason: No client is connected.')
+                return [False, True]
+            except OSError as e:
+                # Reading the file failed. The client waits for the announced
+                # length, the connection can not be used anymore.
+                self.logger.error('SERVER | Could not send data. Reason: '
+                                  '{}'.format(e))
+                self.shutdown()
+                return [True, False]
+
+        if sent != length:
+            # The client waits for the announced length, the connection can
+            # not be used anymore.
+            self.logger.error('SERVER | Error, can not send message. Reason: '
+                              'The file was changed while sending it.')
+            self.shutdown()
+            return [False, True]
+
+        self.logger.debug('SERVER | Send length of message: %s', length)
+        self.logger.debug('SERVER | Send file: %s', path)
+        self.logger.info('SERVER | Message was sent.')
+        return [True, True]
+
+    def _send_parts(self, header, body):
+        """Sends header and body at once. Where supported (socket.sendmsg),
+        both are passed to the operating system without joining them first.
+
+        Args:
+            header: The header (bytes).
+            body: The body (bytes).
+        """
+        if not _SENDMSG:
+            self.client_conn.sendall(header + body)
+            return
+
+        sent = self.client_conn.sendmsg([header, body])
+        if sent < len(header):
+            self.client_conn.sendall(header[sent:] + body)
+        elif sent < len(header) + len(body):
+            self.client_conn.sendall(memoryview(body)[sent - len(header):])
+
+    def _send_binary(self, data):
+        """Sends a dict in the binary format (see recv).
+
+        Args:
+            data: The dict to send.
 
-            # 2. step: Send the original message.
-            self.client_conn.sendall(data.encode())
-            self.logger.debug('SERVER | Send original message: {}'.format(data))
+        Return:
+            - [#1, #2] as described by send.
+        """
+        if msgpack is None:
+            self.logger.error('SERVER | Could not send data. Reason: The '
+                              'package msgpack is not installed.')
+            return [True, False]
+        try:
+            body = msgpack.packb(data, use_bin_type=True)
+        except (TypeError, ValueError) as e:
+            self.logger.error('SERVER | Could not send data. Reason: '
+                              '{}'.format(e))
+            return [True, False]
 
+        try:
+            self._send_parts(_BINARY_HEADER.pack(BINARY_MAGIC, len(body)),
+                             body)
             self.logger.info('SERVER | Message was sent.')
             return [True, True]
         except socket.error:
@@ -127,6 +395,13 @@ class SocketServer:
             1. step: Get the length of the message.
             2. step: Receive the original message with respect to step one.
 
+        Two formats are supported:
+            - Text: The length as decimal digits (16 at most) terminated by
+              a line feed, followed by the UTF-8 encoded message.
+            - Binary: The byte BINARY_MAGIC, the length as 4 byte unsigned
+              integer (big-endian), followed by the message packed with
+              msgpack. Requires the msgpack package.
+
         Special case:
             If a message is received in the JSON format
             {
@@ -134,7 +409,8 @@ class SocketServer:
                 "level": out of {10, 20, 30, 40, 50},
                 "msg": "message as string or numeric value"
             }
-            then the message is logged with the specified level and client name.
+            or as the respective binary message, then the message is logged
+            with the specified level and client name.
 
         Return:
             - [#1, #2]
@@ -146,59 +422,94 @@ class SocketServer:
                               'No client is connected.')
             return [False, False]
 
-        # Read the length of the data.
-        length_str = ""
-        char = ""
-        while char != '\n':
-            length_str += char
-            try:
-                char = self.client_conn.recv(1).decode()
-            except socket.timeout:
+        try:
+            if self._partial is not None:
+                # Resume a message interrupted by a timeout.
+                view, binary = self._recv_partial()
+            else:
+                if self._rxpos == self._rxend:
+                    self._recv_more()
+                binary = self._rxbuf[self._rxpos] == BINARY_MAGIC
+
+                # 1. step: Get the length of the message.
+                if binary:
+                    while self._rxend - self._rxpos < _BINARY_HEADER.size:
+                        self._recv_more()
+                    _, total = _BINARY_HEADER.unpack_from(self._rxbuf,
+                                                          self._rxpos)
+                    start = self._rxpos + _BINARY_HEADER.size
+                else:
+                    end = self._rxbuf.find(b'\n', self._rxpos, self._rxend)
+                    while end < 0:
+                        searched = self._rxend - self._rxpos
+                        if searched > _LEN_DIGITS:
+                            return self._framing_error(
+                                'The length of the message is not '
+                                'terminated by a line feed within {} '
+                                'digits.'.format(_LEN_DIGITS))
+                        self._recv_more()
+                        end = self._rxbuf.find(b'\n', self._rxpos + searched,
+                                               self._rxend)
+
+                    match = _LEN_RE.match(self._rxbuf, self._rxpos, end + 1)
+                    if match is None:
+                        return self._framing_error('Invalid length of the '
+                                                   'message.')
+                    total = int(match.group(1))
+                    start = match.end()
+
+                # 2. step: Receive the original message.
+                view = self._recv_payload(start, total, binary)
+        except MemoryError:
+            return self._framing_error('The message is too large.')
+        except socket.timeout:
+            return [True, False]
+        except socket.error:
+            self.logger.error('SERVER | Error, can not receive data. '
+                              'Reason: No client is connected.')
+            return [False, False]
+
+        # If the received message is from a special format, log it with the
+        # specified level and client name. Otherwise, log it with level INFO
+        # under the name Client. Only messages looking like a JSON object are
+        # parsed at all.
+        jmsg = None
+        if binary:
+            if msgpack is None:
+                self.logger.error('SERVER | Error, can not read binary '
+                                  'message. Reason: The package msgpack is '
+                                  'not installed.')
                 return [True, False]
-            except socket.error:
-                self.logger.error('SERVER | Error, can not receive data. '
-                                  'Reason: No client is connected.')
-                return [False, False]
-            if not char:
-                self.logger.error('SERVER | Error, can not receive data. '
-                                  'Reason: No client is connected.')
-                return [False, False]
-            if (char.isdigit() is False) and (char != '\n'):
-                length_str = ""
-                char = ""
-        total = int(length_str)
-
-        # Receive the data chunk by chunk.
-        view = memoryview(bytearray(total))
-        next_offset = 0
-        while total - next_offset > 0:
             try:
-                recv_size = self.client_conn.recv_into(view[next_offset:],
-                                                       total - next_offset)
-            except socket.timeout:
+                jmsg = msgpack.unpackb(view, raw=False)
+            except ValueError:
+                self.logger.error('SERVER | Error, can not read binary '
+                                  'message. Reason: Invalid message.')
                 return [True, False]
-            except socket.error:
-                self.logger.error('SERVER | Error, can not receive data. '
-                                  'Reason: No client is connected.')
-                return [False, False]
-            next_offset += recv_size
-
-        data = view.tobytes().decode()
+            data = str(jmsg)
+        else:
+            # Keep the message as bytes, it is only decoded for logging.
+            data = view
+            if _OBJECT_RE.fullmatch(view):
+                try:
+                    jmsg = _loads(view)
+                except ValueError:
+                    # Python dicts are accepted as well.
+                    try:
+                        jmsg = _loads(bytes(view).replace(b"'", b'"'))
+                    except ValueError:
+                        pass
 
-        # If the received message is from a special format, log it with the
-        # specified level and client name. Otherwise, log it with level INFO
-        # under the name Client.
-        data = data.replace("'", '\"')
         client = None
         level = None
         msg = None
         try:
-            jmsg = json.loads(data)
             if len(jmsg) == 3:
                 client = jmsg['client']
                 level = jmsg['level']
                 msg = jmsg['msg']
-            if level not in range(10, 60, 10):
+            # logging only accepts integer levels, 20.0 == 20 is not enough.
+            if type(level) is not int or level not in {10, 20, 30, 40, 50}:
                 level = None
         except (TypeError, KeyError, ValueError):
             pass
@@ -209,18 +520,179 @@ class SocketServer:
         else:
             if len(data) == 0:
                 data = "-- empty string --"
+            elif not binary:
+                data = str(data, 'utf-8', 'replace')
             self.logger.info('Client | {}'.format(data))
 
         return [True, True]
 
-    def close(self):
-        """Closes the socket and the connection to the client."""
+    def _framing_error(self, reason):
+        """Shuts down the connection after the client violated the format of
+        the messages or sent a message too large to receive. The start of the
+        next message can not be found anymore.
+
+        Args:
+            reason: The violation.
+
+        Return:
+            - [#1, #2] as described by recv.
+        """
+        self.logger.error('SERVER | Error, can not receive data. Reason: '
+                          '{} Closing the connection.'.format(reason))
+        self.shutdown()
+        self._rxpos = 0
+        self._rxend = 0
+        self._partial = None
+        return [False, False]
+
+    def buffered(self):
+        """Provides the number of received bytes not processed yet.
+
+        Return:
+            Number of bytes in the receive buffer.
+        """
+        return self._rxend - self._rxpos
+
+    def _recv_more(self):
+        """Receives as many bytes as fit into the receive buffer, but waits
+        for one byte at most. Moves the unprocessed bytes to the front of the
+        buffer, if there is no space left behind them.
+
+        Raises:
+            socket.error: If the connection was closed by the client.
+        """
+        if self._rxend == len(self._rxbuf):
+            size = self._rxend - self._rxpos
+            self._rxbuf[:size] = self._rxbuf[self._rxpos:self._rxend]
+            self._rxpos = 0
+            self._rxend = size
+        recv_size = self.client_conn.recv_into(self._rxview[self._rxend:])
+        if not recv_size:
+            raise ConnectionResetError('Connection closed by the client.')
+        self._rxend += recv_size
+
+    def _recv_payload(self, start, total, binary):
+        """Receives a message, starting with the bytes already in the receive
+        buffer.
+
+        If the message fits into the receive buffer (together with its
+        header), it is received there and the returned memoryview refers to
+        the receive buffer. It is only valid until the next receive.
+        Otherwise the message is received chunk by chunk into a buffer of
+        the pool (see _recv_partial).
+
+        In both cases, receiving can be resumed after a timeout.
+
+        Args:
+            start: Position of the message in the receive buffer.
+            total: Length of the message.
+            binary: True, if the message is in the binary format.
+
+        Return:
+            view: A memoryview containing the message.
+
+        Raises:
+            socket.error: If the connection was closed by the client.
+        """
+        if total <= len(self._rxbuf) - (start - self._rxpos):
+            # The header stays in the buffer until the message is complete,
+            # so that receiving can be resumed after a timeout.
+            size = start - self._rxpos + total
+            while self._rxend - self._rxpos < size:
+                self._recv_more()
+            self._rxpos += size
+            return self._rxview[self._rxpos - total:self._rxpos]
+
+        if total > self.pool.slab_size:
+            view = self._body(total)
+        else:
+            view = self.pool.take(total)
+        next_offset = self._rxend - start
+        view[:next_offset] = self._rxview[start:self._rxend]
+        self._rxpos = 0
+        self._rxend = 0
+        self._partial = [view, next_offset, binary]
+        view, _ = self._recv_partial()
+        return view
+
+    def _recv_partial(self):
+        """Receives the rest of a message too large for the receive buffer.
+        After a timeout, the bytes received so far are kept, so that the next
+        call continues where this one stopped.
+
+        Return:
+            - (#1, #2)
+                #1: A memoryview containing the message.
+                #2: True if the message is in the binary format.
+
+        Raises:
+            socket.error: If the connection was closed by the client.
+        """
+        view, next_offset, binary = self._partial
+        total = len(view)
+        # Large messages arrive in many chunks, look up the method only once.
+        recv_into = self.client_conn.recv_into
+        try:
+            while total - next_offset > 0:
+                recv_size = recv_into(view[next_offset:], total - next_offset)
+                if not recv_size:
+                    raise ConnectionResetError('Connection closed by the '
+                                               'client.')
+                next_offset += recv_size
+        except socket.timeout:
+            self._partial[1] = next_offset
+            raise
+        self._partial = None
+        return view, binary
+
+    def _body(self, total):
+        """Provides a buffer for a message too large for the pool. Depending
+        on buffer_relax, a newly allocated buffer is kept for later messages
+            0: always, the buffer only grows.
+            1: if it does not exceed rxbody_size.
+            2: never, a buffer is allocated for each message.
+
+        Args:
+            total: Length of the message.
+
+        Return:
+            view: A writable memoryview of the requested size.
+        """
+        if total <= len(self._rxbody):
+            return memoryview(self._rxbody)[:total]
+
+        body = bytearray(total)
+        if self.buffer_relax == 0 \
+                or (self.buffer_relax == 1 and total <= self.rxbody_size):
+            self._rxbody = body
+        return memoryview(body)
+
+    def shutdown(self):
+        """Shuts down the connection to the client. Blocking calls on the
+        connection in other threads return immediately afterwards."""
+        # The IOThread may close the connection at the same time.
+        conn = self.client_conn
+        if conn is not None:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+
+    def close_client(self):
+        """Closes the connection to the client."""
         if self.client_conn is not None:
             self.client_conn.close()
             self.client_conn = None
             self.client_addr = None
+            self._rxpos = 0
+            self._rxend = 0
+            self._partial = None
             self.logger.info('SERVER | Close connection to client.')
 
+    def close(self):
+        """Closes the socket and the connection to the client."""
+        self.close_client()
+
         if self.socket is not None:
             self.socket.close()
             self.socket = None
@@ -233,43 +705,20 @@ class Server(SocketInterface):
     desired socket communication.
     """
 
-    def __init__(self, count):
+    def __init__(self, count, pool=None):
         super().__init__(count)
-        self.server = SocketServer(self.logger)
-        self.last_client_addr = None
+        self.server = SocketServer(self.logger, pool)
 
-        # Threads.
-        self.accept_thread = AcceptThread()
-        self.accept_thread.server = self.server
-
-        self.receive_thread = ReceiveThread()
-        self.receive_thread.server = self.server
-        sleep = 1.0
-        try:
-            sleep = config.var.data['socket']['sleep']
-            self.logger.debug('SERVER | Set the sleep time between two '
-                              'consecutive messages to {} seconds as defined '
-                              'in the config.json file.'.format(sleep))
-        except (TypeError, KeyError):
-            self.logger.debug('SERVER | Set the sleep time between two '
-                              'consecutive messages to the predefined value '
-                              'of {}, since no respective entry (socket --> '
-                              'sleep) could be find in the config.json file. '
-                              'If needed, please make appropriate changes and '
-                              'reload this tool.'.format(sleep))
-        finally:
-            self.receive_thread.sleep = sleep
-
-        self.send_thread = SendThread()
-        self.send_thread.server = self.server
+        # Thread.
+        self.io_thread = IOThread()
+        self.io_thread.server = self.server
 
         # Connections.
         self.createButton.clicked.connect(self._toggle_server_status)
         self.sendButton.clicked.connect(self._send)
         self.startButton.clicked.connect(self._toggle_recv)
-        self.accept_thread.signal.connect(self._enable_start_recv)
-        self.send_thread.signal.connect(lambda: self._start_accept("send"))
-        self.receive_thread.signal.connect(lambda: self._start_accept("recv"))
+        self.io_thread.accepted.connect(self._enable_start_recv)
+        self.io_thread.disconnected.connect(self._start_accept)
 
     def _toggle_server_status(self):
         """Either starts or stops the server."""
@@ -280,16 +729,16 @@ class Server(SocketInterface):
                 self.createButton.click()
         else:
             # Stops the server
-            if self.accept_thread.isRunning():
-                self.accept_thread.stop_thread()
-                self.accept_thread.wait()
-
             if self.startButton.isChecked():
                 self.startButton.click()
             self.startButton.setEnabled(False)
 
-            if self.send_thread.isRunning():
-                self.send_thread.wait()
+            if self.io_thread.isRunning():
+                self.io_thread.stop_thread()
+                # Abort a transfer in progress instead of blocking the gui
+                # until the client has sent/received all data.
+                self.server.shutdown()
+                self.io_thread.wait()
 
             self.server.close()
 
@@ -311,11 +760,12 @@ class Server(SocketInterface):
             return False
         ok = self.server.create(host, port)
         if ok:
-            if self.accept_thread.server is not None:
-                self.accept_thread.start()
+            if self.io_thread.server is not None:
+                self.io_thread.reset()
+                self.io_thread.start()
             else:
                 self.logger.critical('Internal error. Server for class '
-                                     'AcceptThread is not defined. Please '
+                                     'IOThread is not defined. Please '
                                      'restart the tool.')
                 return False
         else:
@@ -326,131 +776,206 @@ class Server(SocketInterface):
     def _send(self):
         """Sends either a string or the path to a JSON file."""
         if self.stringRadio.isChecked():
-            self.send_thread.data = self.stringToSend
-            self.send_thread.path = False
-            self.send_thread.start()
+            data, path = self.stringToSend, False
+        else:
+            data, path = self.fileToSend, True
+
+        if self.io_thread.isRunning():
+            self.io_thread.enqueue(data, path)
         else:
-            self.send_thread.data = self.fileToSend
-            self.send_thread.path = True
-            self.send_thread.start()
+            # No server, no client. Only reports the error.
+            self.server.send(data, path=path)
 
     def _toggle_recv(self):
         """Starts/Stops receiving messages."""
         if self.startButton.isChecked():
-            if self.receive_thread.server is not None:
-                self.logger.info('SERVER | Start receiving messages.')
-
-                self.receive_thread.start()
-            else:
-                self.logger.critical('Internal error. Server for class '
-                                     'ReceiveThread is not defined. Please '
-                                     'restart the tool.')
+            self.logger.info('SERVER | Start receiving messages.')
+            self.io_thread.set_receiving(True)
         else:
-            self.receive_thread.stop_thread()
-            self.receive_thread.wait()
+            self.io_thread.set_receiving(False)
             self.logger.info('SERVER | Stop receiving messages.')
 
     def _enable_start_recv(self):
         """Starts receiving messages after a connection to a client is made."""
-        self.last_client_addr = self.server.client_addr
         self.startButton.setEnabled(True)
         self.startButton.click()
 
-    def _start_accept(self, who):
-        """Stops receiving messages and starts listening for incoming
-        connection requests."""
+    def _start_accept(self):
+        """Stops receiving messages after the connection to the client is
+        lost. The IOThread listens for incoming connection requests again."""
         if self.startButton.isChecked():
             # Stops receiving messages.
             self.startButton.click()
-        if self.createButton.isChecked() \
-                and not self.accept_thread.isRunning() \
-                and self.last_client_addr == self.server.client_addr:
-            # Starts listening for incoming connection requests.
-            self.startButton.setEnabled(False)
-            self.server.client_conn = None
-            self.server.client_addr = None
-            self.accept_thread.start()
+        self.startButton.setEnabled(False)
+        if self.createButton.isChecked():
             self.logger.info('SERVER | Listening for connections.')
 
 
-class AcceptThread(QThread):
-
-    """A thread for accepting incoming connection requests."""
-
-    signal = pyqtSignal()
-
-    def __init__(self):
-        QThread.__init__(self)
-        self.server = None
-        self.stop = False
+class IOThread(QThread):
 
-    def __del__(self):
-        self.wait()
+    """A thread accepting connection requests as well as sending and
+    receiving messages.
 
-    def stop_thread(self):
-        self.stop = True
+    A selector waits until the server socket (no client connected) or the
+    client connection (receiving) is readable. Another thread wakes it up
+    through a socket pair, e.g. to send a message or to stop it.
 
-    def run(self):
-        self.stop = False
-        self.server.socket.settimeout(1)
-        while True:
-            ok = self.server.accept()
-            if ok or self.stop:
-                break
-        self.server.socket.settimeout(None)
-        if not self.stop:
-            self.signal.emit()
+    The selector can be chosen in the config.json file (socket --> selector)
+    out of epoll, kqueue, devpoll, poll and select. Otherwise the most
+    efficient one of the platform is used (selectors.DefaultSelector).
 
+    Attributes:
+        server: The SocketServer.
+        stop: If True, the thread terminates.
+        receiving: If True, messages of the client are received.
+    """
 
-class ReceiveThread(QThread):
+    accepted = pyqtSignal()
+    disconnected = pyqtSignal()
 
-    """A thread for fetching messages."""
+    selector_class = _SELECTOR
 
-    signal = pyqtSignal()
+    # Time in seconds a message may stall before receiving is aborted.
+    timeout = 1
 
     def __init__(self):
         QThread.__init__(self)
         self.server = None
         self.stop = False
+        self.receiving = False
+        self._sends = queue.Queue()
+        self._watched = None
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
 
     def __del__(self):
         self.wait()
 
     def stop_thread(self):
         self.stop = True
+        self._wake_w.send(b'\0')
 
-    def run(self):
+    def set_receiving(self, receiving):
+        """Starts/Stops receiving messages.
+
+        Args:
+            receiving: True to start, False to stop receiving.
+        """
+        self.receiving = receiving
+        self._wake_w.send(b'\0')
+
+    def enqueue(self, data, path):
+        """Sends data (see SocketServer.send) from within the thread.
+
+        Args:
+            data: The data to send.
+            path: True, if data is the path to a file.
+        """
+        self._sends.put((data, path))
+        self._wake_w.send(b'\0')
+
+    def reset(self):
+        """Resets the state of the thread and discards the wake-ups and
+        messages to send of previous runs. Has to be called before the thread
+        is started, so that no request made after start is lost."""
         self.stop = False
-        self.server.client_conn.settimeout(1)
-        while True:
-            time.sleep(0.5)
-            ok = self.server.recv()
-            if not ok[0] or self.stop:
-                break
-        self.server.client_conn.settimeout(None)
-        if not self.stop:
-            self.signal.emit()
+        self.receiving = False
+        self._drain_wake()
+        try:
+            while True:
+                self._sends.get_nowait()
+        except queue.Empty:
+            pass
 
+    def _drain_wake(self):
+        """Discards all pending wake-ups."""
+        try:
+            while self._wake_r.recv(64):
+                pass
+        except BlockingIOError:
+            pass
 
-class SendThread(QThread):
+    def _watch(self, selector, sock):
+        """Lets the selector watch sock instead of the socket watched before.
 
-    """A thread for sending messages."""
+        Args:
+            selector: The selector.
+            sock: The socket to watch or None.
+        """
+        if sock is self._watched:
+            return
+        if self._watched is not None:
+            selector.unregister(self._watched)
+        if sock is not None:
+            selector.register(sock, selectors.EVENT_READ)
+        self._watched = sock
 
-    signal = pyqtSignal()
+    def _send_pending(self):
+        """Sends all messages enqueued so far.
 
-    def __init__(self):
-        QThread.__init__(self)
-        self.server = None
-        self.data = None
-        self.path = None
+        Return:
+            - True, if the client is still connected.
+            - False, if not.
+        """
+        conn = self.server.client_conn
+        while not self.stop:
+            try:
+                data, path = self._sends.get_nowait()
+            except queue.Empty:
+                break
+            if conn is None:
+                self.server.send(data, path=path)
+                continue
+            # The timeout only applies to receiving.
+            conn.settimeout(None)
+            ok = self.server.send(data, path=path)
+            conn.settimeout(self.timeout)
+            if not ok[0]:
+                return False
+        return True
 
-    def __del__(self):
-        self.wait()
+    def _disconnect(self, selector):
+        """Closes the connection after the client is gone."""
+        self._watch(selector, None)
+        self.server.close_client()
+        self.receiving = False
+        if not self.stop:
+            self.disconnected.emit()
 
     def run(self):
-        if self.path:
-            ok = self.server.send(self.data, path=True)
-        else:
-            ok = self.server.send(self.data, path=False)
-        if not ok[0]:
-            self.signal.emit()
+        self._watched = None
+        server = self.server
+        with self.selector_class() as selector:
+            selector.register(self._wake_r, selectors.EVENT_READ)
+            while not self.stop:
+                conn = server.client_conn
+                if conn is None:
+                    self._watch(selector, server.socket)
+                elif self.receiving:
+                    self._watch(selector, conn)
+                else:
+                    self._watch(selector, None)
+
+                # Do not wait for data, if a message is already buffered.
+                buffered = (self.receiving and conn is not None
+                            and server.buffered())
+                events = selector.select(0 if buffered else None)
+                ready = {key.fileobj for key, _ in events}
+
+                if self._wake_r in ready:
+                    self._drain_wake()
+                if not self._send_pending():
+                    self._disconnect(selector)
+                    continue
+                if self.stop:
+                    break
+
+                if conn is None:
+                    if server.socket in ready and server.accept():
+                        server.client_conn.settimeout(self.timeout)
+                        self.accepted.emit()
+                elif self.receiving and (buffered or conn in ready):
+                    ok = server.recv()
+                    if not ok[0]:
+                        self._disconnect(selector)
+            self._watch(selector, None)
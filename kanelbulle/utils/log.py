@@ -79,6 +79,18 @@ def get_logger(name):
     return logger
 
 
+def release_logger(logger):
+    """Remove all handlers from a logger and drop it from the logging module,
+    so that the logger and its handlers can be garbage collected.
+
+    Args:
+        logger: the logger to release (logging.Logger).
+    """
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logging.Logger.manager.loggerDict.pop(logger.name, None)
+
+
 # The different loggers used (alphabetical order).
 app = get_logger('app')
 config = get_logger('config')
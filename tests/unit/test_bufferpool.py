@@ -0,0 +1,45 @@
+"""Tests for kanelbulle.misc.bufferpool."""
+
+from kanelbulle.misc import bufferpool
+
+
+def test_take_size():
+    """The buffer provided shall have the requested size and be writable."""
+    pool = bufferpool.BufferPool(slab_size=64, threshold=8)
+    view = pool.take(10)
+    view[:] = b'0123456789'
+    assert len(view) == 10
+    assert view.tobytes() == b'0123456789'
+
+
+def test_take_no_overlap():
+    """Buffers taken one after another shall not share memory."""
+    pool = bufferpool.BufferPool(slab_size=64, threshold=8)
+    first = pool.take(16)
+    second = pool.take(16)
+    first[:] = 16*b'a'
+    second[:] = 16*b'b'
+    assert first.tobytes() == 16*b'a'
+
+
+def test_take_new_slab():
+    """IF the space left in the slab falls below the threshold, THEN the next
+    buffer shall be taken from a new slab.
+    """
+    pool = bufferpool.BufferPool(slab_size=64, threshold=8)
+    first = pool.take(60)
+    second = pool.take(60)
+    assert first.obj is not second.obj
+
+
+def test_take_larger_than_slab():
+    """IF the requested size exceeds the slab size, THEN a separate buffer
+    shall be provided and the slab shall remain untouched.
+    """
+    pool = bufferpool.BufferPool(slab_size=64, threshold=8)
+    first = pool.take(8)
+    large = pool.take(128)
+    second = pool.take(8)
+    assert len(large) == 128
+    assert large.obj is not first.obj
+    assert first.obj is second.obj
@@ -1,6 +1,7 @@
 """Tests for kanelbulle.utils.log."""
 
 import importlib
+import logging
 import pytest
 from unittest import mock
 from kanelbulle.utils import log
@@ -43,3 +44,13 @@ def test_init_(mock_logging):
     """
     log.__init__()
     mock_logging.FileHandler.assert_called_with(mock.ANY, mode='w')
+
+
+def test_release_logger():
+    """A released logger shall have no handlers left and shall no longer be
+    known by the logging module.
+    """
+    logger = log.get_logger('Release')
+    log.release_logger(logger)
+    assert (logger.handlers == []) == True
+    assert ('Release' in logging.Logger.manager.loggerDict) == False
@@ -0,0 +1,270 @@
+"""Tests for kanelbulle.misc.socket."""
+
+import logging
+import selectors
+import socket
+import threading
+import time
+from unittest import mock
+import pytest
+
+pytest.importorskip('PyQt5')
+
+from kanelbulle.config import config  # noqa: E402
+from kanelbulle.misc import bufferpool  # noqa: E402
+from kanelbulle.misc import socket as misc_socket  # noqa: E402
+
+
+def frame(body):
+    """Provides a text message with its length header."""
+    return b'%d\n' % len(body) + body
+
+
+def recv_exactly(sock, size):
+    """Receives size bytes from sock."""
+    data = b''
+    while len(data) < size:
+        data += sock.recv(size - len(data))
+    return data
+
+
+def assert_shut_down(client):
+    """The server shall have shut down the connection."""
+    assert client.recv(1) == b''
+
+
+@pytest.fixture
+def server(caplog):
+    """A SocketServer connected to a client through a socket pair."""
+    caplog.set_level(logging.DEBUG, logger='test_socket')
+    srv = misc_socket.SocketServer(logging.getLogger('test_socket'))
+    srv.client_conn, client = socket.socketpair()
+    srv.client_conn.settimeout(0.2)
+    client.settimeout(1)
+    yield srv, client
+    srv.close()
+    client.close()
+
+
+def test_recv_split_header(server, caplog):
+    """IF the length header arrives in two parts, THEN the message shall be
+    received after the second part.
+    """
+    srv, client = server
+    client.sendall(b'1')
+    assert srv.recv() == [True, False]
+    client.sendall(b'1\nhello world')
+    assert srv.recv() == [True, True]
+    assert caplog.messages[-1] == 'Client | hello world'
+
+
+def test_recv_several_messages(server, caplog):
+    """IF several messages arrive at once, THEN each shall be received by a
+    call of recv.
+    """
+    srv, client = server
+    client.sendall(frame(b'one') + frame(b'two') + frame(b''))
+    for _ in range(3):
+        assert srv.recv() == [True, True]
+    assert caplog.messages[-3:] == ['Client | one', 'Client | two',
+                                    'Client | -- empty string --']
+
+
+@pytest.mark.parametrize('data', [17*b'1' + b'\nx', 40*b'1', b'12a\nxyz',
+                                  b'+5\nhello', b' 5\nhello'])
+def test_recv_framing_error(server, data):
+    """IF the length header is invalid, too long or not terminated, THEN the
+    connection shall be shut down.
+    """
+    srv, client = server
+    client.sendall(data)
+    assert srv.recv() == [False, False]
+    assert_shut_down(client)
+
+
+def test_recv_python_dict(server, caplog):
+    """IF a control message is sent as Python dict, THEN it shall be logged
+    with the specified level and client name.
+    """
+    srv, client = server
+    client.sendall(frame(b"{'client': 'c', 'level': 30, 'msg': 'hi'}"))
+    assert srv.recv() == [True, True]
+    assert caplog.records[-1].levelno == logging.WARNING
+    assert caplog.messages[-1] == 'c | hi'
+
+
+def test_recv_json_apostrophe(server, caplog):
+    """IF a control message contains an apostrophe, THEN it shall be parsed
+    without rewriting the quotes.
+    """
+    srv, client = server
+    client.sendall(frame(b'{"client": "c", "level": 20, "msg": "it\'s"}'))
+    assert srv.recv() == [True, True]
+    assert caplog.messages[-1] == "c | it's"
+
+
+@pytest.mark.parametrize('level', [b'20.0', b'true', b'25', b'"20"'])
+def test_recv_invalid_level(server, caplog, level):
+    """IF the level of a control message is not one of the integer levels,
+    THEN the message shall be logged as it is.
+    """
+    srv, client = server
+    body = b'{"client": "c", "level": %s, "msg": "m"}' % level
+    client.sendall(frame(body))
+    assert srv.recv() == [True, True]
+    assert caplog.messages[-1] == 'Client | ' + body.decode()
+
+
+def test_recv_invalid_utf8(server, caplog):
+    """IF a message is not valid UTF-8, THEN it shall be logged with the
+    invalid bytes replaced.
+    """
+    srv, client = server
+    client.sendall(frame(b'ab\xff'))
+    assert srv.recv() == [True, True]
+    assert caplog.messages[-1] == 'Client | ab\ufffd'
+
+
+def test_recv_binary(server, caplog):
+    """IF a control message is sent in the binary format, THEN it shall be
+    logged with the specified level and client name.
+    """
+    msgpack = pytest.importorskip('msgpack')
+    srv, client = server
+    body = msgpack.packb({'client': 'c', 'level': 40, 'msg': 'bin'})
+    client.sendall(misc_socket._BINARY_HEADER.pack(misc_socket.BINARY_MAGIC,
+                                                   len(body)) + body)
+    assert srv.recv() == [True, True]
+    assert caplog.records[-1].levelno == logging.ERROR
+    assert caplog.messages[-1] == 'c | bin'
+
+
+@pytest.mark.parametrize('prefix', [b'', frame(b'x')])
+@pytest.mark.parametrize('size', [16378, 16379, 40000])
+def test_recv_buffer_boundary(server, caplog, prefix, size):
+    """IF a message fills the receive buffer exactly or exceeds it, THEN it
+    shall be received completely, also behind another message.
+    """
+    srv, client = server
+    body = bytes(ord('a') + i % 26 for i in range(size))
+    client.sendall(prefix + frame(body) + frame(b'next'))
+    for _ in range(3 if prefix else 2):
+        assert srv.recv() == [True, True]
+    assert caplog.messages[-2] == 'Client | ' + body.decode()
+    assert caplog.messages[-1] == 'Client | next'
+
+
+@pytest.mark.parametrize('buffer_relax, kept', [(0, 40000), (1, 40000),
+                                                (2, 0)])
+def test_recv_buffer_relax(server, buffer_relax, kept):
+    """IF a message is too large for the pool, THEN its buffer shall be kept
+    for later messages as defined by buffer_relax.
+    """
+    srv, client = server
+    srv.pool = bufferpool.BufferPool(slab_size=20000)
+    srv.buffer_relax = buffer_relax
+    client.sendall(frame(40000*b'a'))
+    assert srv.recv() == [True, True]
+    assert len(srv._rxbody) == kept
+
+
+def test_recv_buffer_relax_limit(server):
+    """IF buffer_relax equals 1 and a message exceeds rxbody_size, THEN its
+    buffer shall not be kept.
+    """
+    srv, client = server
+    srv.pool = bufferpool.BufferPool(slab_size=20000)
+    srv.buffer_relax = 1
+    srv.rxbody_size = 30000
+    client.sendall(frame(40000*b'a'))
+    assert srv.recv() == [True, True]
+    assert len(srv._rxbody) == 0
+
+
+def test_recv_resume_large_message(server, caplog):
+    """IF a message larger than the receive buffer stalls longer than the
+    timeout, THEN the next receive shall continue the message.
+    """
+    srv, client = server
+    client.sendall(b'100000\n' + 50000*b'a')
+    assert srv.recv() == [True, False]
+    client.sendall(50000*b'b')
+    assert srv.recv() == [True, True]
+    assert caplog.messages[-1] == 'Client | ' + 50000*'a' + 50000*'b'
+
+
+def wait_for(condition, timeout=2):
+    """Waits until condition() is true or the timeout expires."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_io_thread(caplog):
+    """IF the IOThread runs, THEN it shall accept a client, receive its
+    messages, send enqueued messages and stop on request.
+    """
+    caplog.set_level(logging.DEBUG, logger='test_socket')
+    srv = misc_socket.SocketServer(logging.getLogger('test_socket'))
+    assert srv.create('127.0.0.1', 0)
+    io_thread = misc_socket.IOThread()
+    io_thread.server = srv
+    io_thread.reset()
+    thread = threading.Thread(target=io_thread.run)
+    thread.start()
+    client = socket.create_connection(srv.socket.getsockname(), timeout=2)
+    try:
+        assert wait_for(lambda: srv.client_conn is not None)
+        io_thread.set_receiving(True)
+        client.sendall(frame(b'ping'))
+        assert wait_for(lambda: 'Client | ping' in caplog.messages)
+
+        io_thread.enqueue('pong', False)
+        assert recv_exactly(client, 6) == b'4\npong'
+
+        io_thread.stop_thread()
+        srv.shutdown()
+        thread.join(2)
+        assert not thread.is_alive()
+    finally:
+        client.close()
+        srv.close()
+
+
+@pytest.mark.parametrize('entry, value, error', [
+    ({}, 1, False),
+    ({'buffer_relax': 0}, 0, False),
+    ({'buffer_relax': 3}, 1, True),
+    ({'buffer_relax': 'wrong'}, 1, True)])
+def test_load_config(entry, value, error):
+    """IF an entry is missing or invalid, THEN the default shall be used and
+    only invalid entries shall be reported.
+    """
+    with mock.patch.object(config.var, 'data', {'socket': entry}), \
+            mock.patch.object(misc_socket, 'CONFIG_ERRORS', []):
+        assert misc_socket._load_config('buffer_relax',
+                                        misc_socket._parse_relax, 1) == value
+        assert (misc_socket.CONFIG_ERRORS == ['buffer_relax']) == error
+
+
+def test_parse_selector():
+    """IF a selector is unknown, THEN a ValueError shall be raised."""
+    assert misc_socket._parse_selector('select') is selectors.SelectSelector
+    with pytest.raises(ValueError):
+        misc_socket._parse_selector('wrong')
+
+
+def test_send_file_unreadable(server, tmp_path):
+    """IF the size of a file can not be read, THEN it shall not be sent and
+    the client shall stay connected.
+    """
+    srv, client = server
+    path = tmp_path / 'msg.json'
+    path.write_text('{}')
+    with mock.patch.object(misc_socket.os, 'fstat', side_effect=OSError):
+        assert srv.send(str(path), path=True) == [True, False]
+    assert srv.send(str(path), path=True) == [True, True]
+    assert recv_exactly(client, 4) == b'2\n{}'